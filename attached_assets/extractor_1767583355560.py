@@ -7,13 +7,15 @@ Supports OpenAI and Anthropic APIs for intelligent table extraction.
 
 import os
 import re
-import json
+import io
+import csv
 import logging
-from typing import Optional
+from typing import Optional, Union
 from io import BytesIO
 
+import orjson
 import pdfplumber
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -236,13 +238,24 @@ def _call_anthropic(client, text: str) -> str:
     message = client.messages.create(
         model="claude-sonnet-4-20250514",
         max_tokens=8192,
-        system=SYSTEM_PROMPT,
+        system=[
+            {
+                "type": "text",
+                "text": SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"}
+            }
+        ],
         messages=[
             {
                 "role": "user",
                 "content": f"Extract the Modbus register table from this technical manual text:\n\n{text}"
             }
-        ]
+        ],
+        extra_headers={"anthropic-beta": "prompt-caching-2024-07-31"}
+    )
+    logger.info(
+        f"Anthropic prompt cache: {getattr(message.usage, 'cache_read_input_tokens', 0) or 0} tokens read, "
+        f"{getattr(message.usage, 'cache_creation_input_tokens', 0) or 0} tokens written"
     )
     return message.content[0].text
 
@@ -270,8 +283,8 @@ def _extract_json_from_response(response: str) -> dict:
     """
     # Try direct JSON parse first
     try:
-        return json.loads(response)
-    except json.JSONDecodeError:
+        return orjson.loads(response)
+    except orjson.JSONDecodeError:
         pass
     
     # Try to find JSON in markdown code blocks
@@ -286,13 +299,100 @@ def _extract_json_from_response(response: str) -> dict:
         if match:
             try:
                 json_str = match.group(1) if '```' in pattern else match.group(0)
-                return json.loads(json_str)
-            except (json.JSONDecodeError, IndexError):
+                return orjson.loads(json_str)
+            except (orjson.JSONDecodeError, IndexError):
                 continue
     
     raise ValueError("Could not extract valid JSON from AI response")
 
 
+# Page markers written by extract_text_from_pdf
+_PAGE_MARKER_RE = re.compile(r'^--- Page (\d+) ---$', re.M)
+
+# Patterns that strongly suggest a page documents Modbus registers
+_REGISTER_INDICATORS_RE = re.compile(
+    r'\bmodbus\b|\bregister\s*(?:address|map|table|list)\b|\b[34]0[0-9]{3,4}\b'
+    r'|\b(?:holding|input)\s*register|\bread.?write\b|\br/w\b'
+    r'|0x[0-9a-f]{2,4}\b|scaling:\s*[\d./]+|offset:\s*-?[\d.]+|data\s*range',
+    re.I,
+)
+
+# Keyword weights for page scoring; each keyword's contribution is capped
+_RELEVANCE_KEYWORDS = {
+    'modbus': 1.5, 'register': 1.0, 'holding': 0.8, 'coil': 0.8,
+    'scaling': 1.2, 'offset': 1.0, 'address': 0.5,
+    'uint16': 0.8, 'int16': 0.8, 'uint32': 0.8, 'int32': 0.8, 'float32': 0.8,
+    'r/w': 0.7, 'read/write': 0.7, 'function code': 0.6,
+}
+
+
+def _score_page_text(page_text: str) -> float:
+    """
+    Score how likely a page is to contain Modbus register data.
+    
+    Args:
+        page_text: Text of a single page, including any table data
+        
+    Returns:
+        Relevance score (higher is more relevant)
+    """
+    text_lower = page_text.lower()
+    score = min(len(_REGISTER_INDICATORS_RE.findall(page_text)) * 2.0, 20.0)
+    for keyword, weight in _RELEVANCE_KEYWORDS.items():
+        score += min(text_lower.count(keyword) * weight, 5.0)
+    if "[TABLE DATA]" in page_text:
+        score += 3.0
+    # Register maps are often moved to an appendix at the end of the manual
+    if 'appendix' in text_lower and 'register' in text_lower:
+        score += 5.0
+    return score
+
+
+def _select_relevant_pages(text: str, max_chars: int) -> str:
+    """
+    Reduce extracted text to the highest-scoring pages that fit in max_chars.
+    
+    Pages are picked best-first and then put back in document order, so
+    register tables deep in the manual aren't cut off in favour of cover
+    pages and front matter.
+    
+    Args:
+        text: Text produced by extract_text_from_pdf
+        max_chars: Maximum number of characters to keep
+        
+    Returns:
+        Selected pages in page order
+    """
+    parts = _PAGE_MARKER_RE.split(text)
+    if len(parts) < 3:
+        # No page markers to rank by
+        return text[:max_chars]
+    
+    pages = [
+        (int(parts[i]), f"--- Page {parts[i]} ---{parts[i + 1]}")
+        for i in range(1, len(parts), 2)
+    ]
+    ranked = sorted(pages, key=lambda page: _score_page_text(page[1]), reverse=True)
+    
+    selected = []
+    used = 0
+    for page_number, page_text in ranked:
+        if used + len(page_text) <= max_chars:
+            selected.append((page_number, page_text))
+            used += len(page_text)
+    
+    if not selected:
+        # Even the best page is over budget on its own; keep its start
+        return ranked[0][1][:max_chars]
+    
+    selected.sort(key=lambda page: page[0])
+    logger.info(
+        f"Selected {len(selected)} of {len(pages)} pages for parsing: "
+        f"{[page_number for page_number, _ in selected]}"
+    )
+    return "".join(page_text for _, page_text in selected)
+
+
 def ai_parse_data(text: str) -> ModbusRegisterTable:
     """
     Use AI to parse Modbus register data from extracted text.
@@ -303,11 +403,13 @@ def ai_parse_data(text: str) -> ModbusRegisterTable:
     Returns:
         ModbusRegisterTable with validated register data
     """
-    # Truncate text if too long (most LLMs have context limits)
+    # Trim text if too long (most LLMs have context limits), keeping the
+    # pages most likely to hold register tables rather than the first ones
     max_chars = 100000
     if len(text) > max_chars:
-        logger.warning(f"Text truncated from {len(text)} to {max_chars} characters")
-        text = text[:max_chars]
+        original_len = len(text)
+        text = _select_relevant_pages(text, max_chars)
+        logger.warning(f"Text reduced from {original_len} to {len(text)} characters")
     
     # Get AI client
     client_type, client = _get_ai_client()
@@ -338,44 +440,47 @@ def ai_parse_data(text: str) -> ModbusRegisterTable:
 # Utility Functions
 # ============================================================================
 
-def registers_to_csv(registers: list[ModbusRegister]) -> str:
+def registers_to_csv(registers: Union[list[ModbusRegister], list[dict]]) -> str:
     """
     Convert registers to CSV format.
     
     Args:
-        registers: List of ModbusRegister objects
+        registers: List of ModbusRegister objects or their model_dump() dicts
         
     Returns:
         CSV string with headers
     """
-    lines = ["address,name,datatype,description,writable"]
-    
-    for reg in registers:
-        # Escape description for CSV (handle commas and quotes)
-        desc = reg.description.replace('"', '""')
-        if ',' in desc or '"' in desc or '\n' in desc:
-            desc = f'"{desc}"'
-        
-        name = reg.name.replace('"', '""')
-        if ',' in name or '"' in name:
-            name = f'"{name}"'
-            
-        lines.append(f"{reg.address},{name},{reg.datatype},{desc},{str(reg.writable).lower()}")
-    
-    return "\n".join(lines)
-
-
-def registers_to_json(registers: list[ModbusRegister]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+    writer.writerow(["address", "name", "datatype", "description", "writable"])
+    if registers and isinstance(registers[0], dict):
+        writer.writerows(
+            (reg["address"], reg["name"], reg["datatype"], reg["description"], str(reg["writable"]).lower())
+            for reg in registers
+        )
+    else:
+        writer.writerows(
+            (reg.address, reg.name, reg.datatype, reg.description, str(reg.writable).lower())
+            for reg in registers
+        )
+    return buf.getvalue()
+
+
+# Serializes straight from model instances in pydantic-core, without
+# building an intermediate dict per register
+_REGISTERS_JSON_ADAPTER = TypeAdapter(dict[str, list[ModbusRegister]])
+
+
+def registers_to_json(registers: Union[list[ModbusRegister], list[dict]]) -> str:
     """
     Convert registers to formatted JSON string.
     
     Args:
-        registers: List of ModbusRegister objects
+        registers: List of ModbusRegister objects or their model_dump() dicts
         
     Returns:
         Formatted JSON string
     """
-    data = {
-        "registers": [reg.model_dump() for reg in registers]
-    }
-    return json.dumps(data, indent=2)
+    if registers and isinstance(registers[0], dict):
+        return orjson.dumps({"registers": registers}, option=orjson.OPT_INDENT_2).decode()
+    return _REGISTERS_JSON_ADAPTER.dump_json({"registers": registers}, indent=2).decode()
@@ -8,74 +8,107 @@ Supports OpenAI and Anthropic APIs for intelligent table extraction.
 
 import os
 import re
+import array
+import asyncio
+import contextlib
+import io
+import csv
 import json
+import hashlib
+import heapq
+import itertools
+import functools
 import logging
-from typing import Optional
+import multiprocessing
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Final, Optional, Union
 from dataclasses import dataclass, field
 from io import BytesIO
+from pathlib import Path
 
+import ahocorasick
+import diskcache
+import orjson
 import pdfplumber
-from pydantic import BaseModel, Field, field_validator
+import pymupdf
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Model names (also part of the result cache key)
+ANTHROPIC_MODEL = "claude-sonnet-4-20250514"
+OPENAI_MODEL = "gpt-4-turbo-preview"
+
+# On-disk cache of parsed register tables, keyed by PDF content + model
+# + pipeline version and system prompt
+_cache_dir = Path(os.getenv("MODMAPPER_CACHE_DIR", "~/.modmapper/cache")).expanduser()
+
+# Bump when page selection, context assembly or response handling changes
+# what the pipeline extracts, so cached results are recomputed
+_RESULT_CACHE_VERSION = 1
+
 
 # ============================================================================
 # Pydantic Models for Data Validation
 # ============================================================================
 
+# Source data type spellings -> normalized type names
+_DATATYPE_MAP: Final[dict[str, str]] = {
+    'int': 'INT16',
+    'int16': 'INT16',
+    'sint16': 'INT16',
+    'integer': 'INT16',
+    'uint': 'UINT16',
+    'uint16': 'UINT16',
+    'word': 'UINT16',
+    'int32': 'INT32',
+    'sint32': 'INT32',
+    'long': 'INT32',
+    'uint32': 'UINT32',
+    'dword': 'UINT32',
+    'ulong': 'UINT32',
+    'float': 'FLOAT32',
+    'float32': 'FLOAT32',
+    'real': 'FLOAT32',
+    'single': 'FLOAT32',
+    'float64': 'FLOAT64',
+    'double': 'FLOAT64',
+    'lreal': 'FLOAT64',
+    'string': 'STRING',
+    'ascii': 'STRING',
+    'bool': 'BOOL',
+    'boolean': 'BOOL',
+    'bit': 'BOOL',
+    'coil': 'COIL',
+}
+
+
 class ModbusRegister(BaseModel):
     """Represents a single Modbus register entry."""
-    address: int = Field(..., description="Register address (standardized to 40xxx format)")
+    address: int = Field(..., ge=0, description="Register address (standardized to 40xxx format)")
     name: str = Field(..., description="Register name/identifier")
     datatype: str = Field(..., description="Data type (e.g., INT16, UINT32, FLOAT32)")
     description: str = Field(..., description="Register description")
     writable: bool = Field(..., description="Whether the register is writable (R/W) or read-only (R)")
 
-    @field_validator('address')
-    @classmethod
-    def validate_address(cls, v: int) -> int:
-        """Ensure address is a positive integer."""
-        if v < 0:
-            raise ValueError("Address must be a positive integer")
-        return v
-
     @field_validator('datatype')
     @classmethod
     def normalize_datatype(cls, v: str) -> str:
         """Normalize data type strings."""
-        datatype_map = {
-            'int': 'INT16',
-            'int16': 'INT16',
-            'sint16': 'INT16',
-            'integer': 'INT16',
-            'uint': 'UINT16',
-            'uint16': 'UINT16',
-            'word': 'UINT16',
-            'int32': 'INT32',
-            'sint32': 'INT32',
-            'long': 'INT32',
-            'uint32': 'UINT32',
-            'dword': 'UINT32',
-            'ulong': 'UINT32',
-            'float': 'FLOAT32',
-            'float32': 'FLOAT32',
-            'real': 'FLOAT32',
-            'single': 'FLOAT32',
-            'float64': 'FLOAT64',
-            'double': 'FLOAT64',
-            'lreal': 'FLOAT64',
-            'string': 'STRING',
-            'ascii': 'STRING',
-            'bool': 'BOOL',
-            'boolean': 'BOOL',
-            'bit': 'BOOL',
-            'coil': 'COIL',
-        }
-        normalized = datatype_map.get(v.lower().strip(), v.upper())
-        return normalized
+        return _DATATYPE_MAP.get(v.lower().strip(), v.upper())
 
 
 class ModbusRegisterTable(BaseModel):
@@ -84,6 +117,10 @@ class ModbusRegisterTable(BaseModel):
     metadata: dict = Field(default_factory=dict)
 
 
+# Reusable validator for parsed LLM output (schema is built once at import)
+_TABLE_ADAPTER = TypeAdapter(ModbusRegisterTable)
+
+
 # ============================================================================
 # Document Chunk for Intelligent Processing
 # ============================================================================
@@ -103,6 +140,35 @@ class DocumentChunk:
 # Stage 1: Intelligent Text Extraction with Structure Preservation
 # ============================================================================
 
+# Documents with fewer pages than this are extracted in-process; below it the
+# cost of starting worker processes outweighs the parallel speedup.
+_PARALLEL_MIN_PAGES = 16
+
+# Cheap text probe deciding whether a page is worth running table detection on
+_TABLE_PROBE_KEYWORDS = ("register", "modbus", "address", "0x", "holding", "r/w")
+
+# Page worker pool shared by every request, created on first use and capped
+# so concurrent requests cannot multiply worker processes. The server process
+# is multi-threaded, so workers are never forked from it directly.
+_PAGE_POOL_MAX_WORKERS = min(os.cpu_count() or 1, 8)
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+# Extracted pages are cached per PDF on disk, shared across server workers.
+# diskcache unpickles its entries, so the cache lives in a private directory.
+_PDF_PAGE_CACHE_DIR = os.getenv("MODMAPPER_PDF_CACHE_DIR", str(_cache_dir / "pdf-pages"))
+_PDF_PAGE_CACHE_SIZE = 1024 * 1024 * 1024  # 1GB
+
+# Bump when the shape of the cached page data (page dicts, TableHeuristics,
+# hints) changes, so stale entries are never handed to the scorer
+_PDF_PAGE_CACHE_VERSION = 2
+
+# Recently extracted page results kept in-process, keyed by page cache key
+_PAGE_RESULTS_MEMO_SIZE = 16
+_page_results_memo: OrderedDict[str, tuple] = OrderedDict()
+_page_results_lock = threading.Lock()
+
+
 def extract_structured_content(file_content: bytes) -> dict:
     """
     Extract text while preserving document structure and identifying 
@@ -115,51 +181,290 @@ def extract_structured_content(file_content: bytes) -> dict:
     }
     
     try:
-        with pdfplumber.open(BytesIO(file_content)) as pdf:
-            structured_data["total_pages"] = len(pdf.pages)
-            logger.info(f"Processing PDF with {len(pdf.pages)} pages")
-            
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_data = {
-                    "page_num": page_num,
-                    "text": page.extract_text() or "",
-                    "tables": [],
-                    "has_register_indicators": False
-                }
-                
-                # Extract tables with structure
-                tables = page.extract_tables()
-                for table_idx, table in enumerate(tables):
-                    if table and len(table) > 1:
-                        table_text = _table_to_text(table)
-                        page_data["tables"].append({
-                            "index": table_idx,
-                            "rows": len(table),
-                            "cols": len(table[0]) if table[0] else 0,
-                            "text": table_text,
-                            "raw": table
-                        })
-                
-                # Check for register-related content
-                page_data["has_register_indicators"] = _has_register_indicators(
-                    page_data["text"], 
-                    page_data["tables"]
-                )
-                
-                # Extract document-level hints (addressing conventions, etc.)
-                hints = _extract_document_hints(page_data["text"])
-                if hints:
-                    structured_data["document_hints"].extend(hints)
-                
-                structured_data["pages"].append(page_data)
-                
+        page_results = _get_page_results(file_content)
     except Exception as e:
         logger.error(f"Error extracting structured content: {e}")
         raise ValueError(f"Failed to extract content from PDF: {str(e)}")
     
+    structured_data["total_pages"] = len(page_results)
+    for page_data, hints in page_results:
+        structured_data["pages"].append(page_data)
+        structured_data["document_hints"].extend(hints)
+    
     return structured_data
 
 
+def _get_page_results(file_content: bytes) -> tuple[tuple[dict, list[str]], ...]:
+    """
+    Get (page_data, document_hints) for every page, parsing the PDF only if
+    this file has not been seen before.
+    
+    Results are memoized in-process by content digest and persisted in a
+    shared disk cache, so extract_structured_content and
+    extract_text_from_pdf (and other server workers) reuse one parse.
+    The returned page data is shared and must not be mutated.
+    """
+    cache_key = _pdf_page_cache_key(file_content)
+    with _page_results_lock:
+        page_results = _page_results_memo.get(cache_key)
+        if page_results is not None:
+            _page_results_memo.move_to_end(cache_key)
+            return page_results
+    
+    # Parse outside the lock so other documents are not held up
+    page_results = _parse_pdf_pages(cache_key, file_content)
+    
+    with _page_results_lock:
+        _page_results_memo[cache_key] = page_results
+        _page_results_memo.move_to_end(cache_key)
+        while len(_page_results_memo) > _PAGE_RESULTS_MEMO_SIZE:
+            _page_results_memo.popitem(last=False)
+    return page_results
+
+
+def _pdf_page_cache_key(file_content: bytes) -> str:
+    """
+    Build the page cache key for a PDF: its content digest plus the cache
+    schema version and the versions of the extraction libraries.
+    """
+    digest = hashlib.blake2b(file_content, digest_size=20).hexdigest()
+    return f"v{_PDF_PAGE_CACHE_VERSION}-pymupdf{pymupdf.VersionBind}-pdfplumber{pdfplumber.__version__}-{digest}"
+
+
+def _parse_pdf_pages(cache_key: str, file_content: bytes) -> tuple[tuple[dict, list[str]], ...]:
+    """
+    Load page results from disk cache or by parsing the PDF.
+    
+    The disk cache is only an optimisation: if it can't be opened, read or
+    written, the PDF is parsed as if it were not cached.
+    """
+    try:
+        cache = _get_pdf_page_cache()
+        page_results = cache.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Ignoring unusable PDF page cache {_PDF_PAGE_CACHE_DIR}: {e}")
+        cache = None
+        page_results = None
+    if page_results is not None:
+        logger.info(f"Loaded {len(page_results)} extracted pages from PDF cache")
+        return page_results
+    
+    page_results = tuple(_extract_all_pages(file_content))
+    if cache is not None:
+        try:
+            cache.set(cache_key, page_results)
+        except Exception as e:
+            logger.warning(f"Could not write PDF page cache {_PDF_PAGE_CACHE_DIR}: {e}")
+    return page_results
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pdf_page_cache() -> diskcache.Cache:
+    """Open the on-disk PDF page cache shared by all server workers."""
+    Path(_PDF_PAGE_CACHE_DIR).mkdir(mode=0o700, parents=True, exist_ok=True)
+    return diskcache.Cache(_PDF_PAGE_CACHE_DIR, size_limit=_PDF_PAGE_CACHE_SIZE)
+
+
+def _extract_all_pages(file_content: bytes):
+    """
+    Extract every page of the PDF.
+    
+    Large documents are processed on the shared page worker pool, since
+    pages are independent and extraction is CPU-bound.
+    """
+    with pymupdf.open(stream=file_content, filetype="pdf") as doc:
+        total_pages = doc.page_count
+    logger.info(f"Processing PDF with {total_pages} pages")
+    
+    if total_pages >= _PARALLEL_MIN_PAGES and _PAGE_POOL_MAX_WORKERS > 1:
+        # Workers open the PDF from a temporary file rather than receiving
+        # a pickled copy of the bytes with every task. Each task is a run of
+        # contiguous pages, about two per worker, so the PDF is opened a few
+        # times per document rather than once per page.
+        with tempfile.NamedTemporaryFile(prefix="modmapper-", suffix=".pdf", delete=False) as tmp:
+            tmp.write(file_content)
+        pages_per_task = max(4, -(-total_pages // (_PAGE_POOL_MAX_WORKERS * 2)))
+        first_pages = range(1, total_pages + 1, pages_per_task)
+        last_pages = (min(first + pages_per_task - 1, total_pages) for first in first_pages)
+        try:
+            executor = _get_page_pool()
+            page_runs = executor.map(_process_page_range, itertools.repeat(tmp.name), first_pages, last_pages)
+            return [page for run in page_runs for page in run]
+        except BrokenProcessPool as e:
+            logger.warning(f"Page worker pool failed, extracting in-process: {e}")
+            _reset_page_pool(executor)
+        finally:
+            os.unlink(tmp.name)
+    
+    return iter_page_data(file_content)
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    """Get the shared page worker pool, starting it on first use."""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            mp_context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _page_pool = ProcessPoolExecutor(max_workers=_PAGE_POOL_MAX_WORKERS, mp_context=mp_context)
+        return _page_pool
+
+
+def _reset_page_pool(executor: ProcessPoolExecutor) -> None:
+    """Discard a broken page worker pool so the next request starts a new one."""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is executor:
+            _page_pool = None
+    executor.shutdown(wait=False)
+
+
+def iter_page_data(file_content: bytes):
+    """
+    Yield (page_data, document_hints) for each page in order.
+    
+    Pages are extracted lazily and their pdfplumber caches are released as
+    soon as each page is done, so memory stays bounded on large manuals.
+    """
+    # PyMuPDF handles plain text (C-backed, much faster); pdfplumber is
+    # kept for table detection only, and is not opened at all unless some
+    # page needs it
+    with pymupdf.open(stream=file_content, filetype="pdf") as doc, \
+            contextlib.ExitStack() as stack:
+        pdf = None
+        
+        def extract_tables(page_num: int) -> list:
+            nonlocal pdf
+            if pdf is None:
+                pdf = stack.enter_context(pdfplumber.open(BytesIO(file_content)))
+            return _extract_page_tables(pdf.pages[page_num - 1])
+        
+        for page_num, mu_page in enumerate(doc, 1):
+            yield _extract_page(page_num, mu_page.get_text() or "", extract_tables)
+
+
+def _process_page_range(pdf_path: str, first_page: int, last_page: int) -> list[tuple[dict, list[str]]]:
+    """
+    Extract pages first_page..last_page (1-based, inclusive) inside a worker
+    process. The PDF is closed before returning, so idle workers hold no
+    documents or deleted temp files open.
+    """
+    with pymupdf.open(pdf_path) as doc, contextlib.ExitStack() as stack:
+        pdf = None
+        
+        def extract_tables(page_num: int) -> list:
+            nonlocal pdf
+            if pdf is None:
+                pdf = stack.enter_context(pdfplumber.open(pdf_path))
+            return _extract_page_tables(pdf.pages[page_num - 1])
+        
+        return [
+            _extract_page(page_num, doc[page_num - 1].get_text() or "", extract_tables)
+            for page_num in range(first_page, last_page + 1)
+        ]
+
+
+def _extract_page_tables(page) -> list:
+    """Extract tables from a pdfplumber page and release its caches."""
+    tables = page.extract_tables()
+    
+    # Release pdfplumber's cached chars/objects for this page
+    page.flush_cache()
+    if hasattr(page.get_textmap, "cache_clear"):
+        page.get_textmap.cache_clear()
+    
+    return tables
+
+
+def _extract_page(page_num: int, page_text: str, extract_tables) -> tuple[dict, list[str]]:
+    """
+    Build page data, tables and hints for one page.
+    
+    Args:
+        page_num: 1-based page number
+        page_text: Plain text of the page
+        extract_tables: Callable taking the page number and returning its
+            raw pdfplumber tables; only called for candidate pages
+    
+    Returns: (page_data, document_hints)
+    """
+    page_data = {
+        "page_num": page_num,
+        "text": page_text,
+        "tables": [],
+        # Every table pdfplumber found, including single-row ones, or None
+        # if the probe skipped table detection (used by extract_text_from_pdf)
+        "raw_tables": None,
+        "has_register_indicators": False
+    }
+    
+    # Table detection is by far the most expensive step, so only run it on
+    # pages whose text mentions something register-like
+    text_lower = page_text.lower()
+    if any(kw in text_lower for kw in _TABLE_PROBE_KEYWORDS):
+        tables = extract_tables(page_num)
+        page_data["raw_tables"] = tables
+    else:
+        tables = []
+    
+    # Extract tables with structure
+    for table_idx, table in enumerate(tables):
+        if table and len(table) > 1:
+            table_text = _table_to_text(table)
+            page_data["tables"].append({
+                "index": table_idx,
+                "rows": len(table),
+                "cols": len(table[0]) if table[0] else 0,
+                "text": table_text,
+                "raw": table,
+                "heuristics": _table_heuristics(table)
+            })
+    
+    # Check for register-related content
+    page_data["has_register_indicators"] = _has_register_indicators(
+        page_text, 
+        page_data["tables"]
+    )
+    
+    # Extract document-level hints (addressing conventions, etc.)
+    hints = _extract_document_hints(page_text)
+    
+    return page_data, hints
+
+
+# Address-like cell values in table data rows
+_ADDRESS_RE = re.compile(r'^(0x[0-9a-f]+|[34]0[0-9]{2,4}|[0-9]{1,5})$', re.I)
+
+
+@dataclass(frozen=True)
+class TableHeuristics:
+    """Table features shared by the indicator check and the table scorer."""
+    headers: tuple[str, ...]
+    header_set: frozenset[str]
+    address_like_count: int
+    row_count: int
+
+
+def _table_heuristics(table: list) -> TableHeuristics:
+    """Compute normalized headers and address-like row counts for a table."""
+    headers = tuple(str(h).lower().strip() if h else "" for h in (table[0] or []))
+    
+    address_like_count = 0
+    for row in table[1:min(10, len(table))]:  # Check first 9 data rows
+        if row:
+            for cell in row[:3]:  # Check first 3 columns
+                if cell and _ADDRESS_RE.match(str(cell).strip()):
+                    address_like_count += 1
+                    break
+    
+    return TableHeuristics(
+        headers=headers,
+        header_set=frozenset(h for h in headers if h),
+        address_like_count=address_like_count,
+        row_count=len(table)
+    )
+
+
 def _table_to_text(table: list) -> str:
     """Convert table to formatted text preserving structure."""
     lines = []
@@ -170,46 +475,62 @@ def _table_to_text(table: list) -> str:
     return "\n".join(lines)
 
 
+# Strong textual indicators of register documentation, compiled into a
+# single alternation so each page is scanned once
+_STRONG_PATTERNS = [
+    r'\bmodbus\b',
+    r'\bregister\s*(address|map|table|list)\b',
+    r'\b40[0-9]{3,4}\b',  # Holding register format
+    r'\b30[0-9]{3,4}\b',  # Input register format
+    r'\bholding\s*register',
+    r'\binput\s*register',
+    r'\bcoil\b.*\baddress\b',
+    r'\bread.?write\b',
+    r'\br/?w\b',
+    r'0x[0-9a-f]{2,4}\b',  # Hex addresses
+    r'scaling:\s*[\d./]+',  # Scaling factors
+    r'offset:\s*-?[\d.]+',  # Offset values
+    r'data\s*range',  # Data range specifications
+]
+_REGISTER_INDICATORS_RE = re.compile("|".join(f"(?:{p})" for p in _STRONG_PATTERNS), re.I)
+
+# Table headers that suggest register-related columns
+_REGISTER_HEADERS = frozenset({
+    'address', 'register', 'offset', 'name', 'datatype', 
+    'type', 'data type', 'description', 'access', 'r/w', 
+    'rw', 'read', 'write', 'function', 'value', 'range',
+    'scaling', 'parameter', 'holding', 'sec lvl', 'ct'
+})
+
+# Addressing convention hints; each pattern gets a named group (g0, g1, ...)
+# in one combined regex so lastgroup maps a match back to its hint
+_ADDRESSING_PATTERNS = [
+    (r'add\s*40[,.]?000\s*to\s*(the\s*)?address', 'PDU addressing: add 40000 to addresses'),
+    (r'pdu\s*addressing', 'Uses PDU addressing convention'),
+    (r'addresses?\s*(are|is)\s*(in\s*)?(the\s*)?range\s*(\d+)', 'Address range specified'),
+    (r'base\s*address\s*(of|is|:)?\s*(\d+)', 'Base address specified'),
+    (r'(big|little)\s*endian', 'Byte order specified'),
+    (r'word\s*swap', 'Word swapping mentioned'),
+    (r'high\s*word\s*first|low\s*word\s*first', 'Word order specified'),
+]
+_ADDRESSING_RE = re.compile(
+    "|".join(f"(?P<g{i}>{p})" for i, (p, _) in enumerate(_ADDRESSING_PATTERNS)),
+    re.I
+)
+
+
 def _has_register_indicators(text: str, tables: list) -> bool:
     """
     Check if page content suggests Modbus register documentation.
     """
-    text_lower = text.lower()
-    
     # Strong indicators in text
-    strong_patterns = [
-        r'\bmodbus\b',
-        r'\bregister\s*(address|map|table|list)\b',
-        r'\b40[0-9]{3,4}\b',  # Holding register format
-        r'\b30[0-9]{3,4}\b',  # Input register format
-        r'\bholding\s*register',
-        r'\binput\s*register',
-        r'\bcoil\b.*\baddress\b',
-        r'\bread.?write\b',
-        r'\br/?w\b',
-        r'0x[0-9a-f]{2,4}\b',  # Hex addresses
-        r'scaling:\s*[\d./]+',  # Scaling factors
-        r'offset:\s*-?[\d.]+',  # Offset values
-        r'data\s*range',  # Data range specifications
-    ]
-    
-    for pattern in strong_patterns:
-        if re.search(pattern, text_lower):
-            return True
+    if _REGISTER_INDICATORS_RE.search(text):
+        return True
     
     # Check table headers for register-related columns
-    register_headers = {
-        'address', 'register', 'offset', 'name', 'datatype', 
-        'type', 'data type', 'description', 'access', 'r/w', 
-        'rw', 'read', 'write', 'function', 'value', 'range',
-        'scaling', 'parameter', 'holding', 'sec lvl', 'ct'
-    }
-    
     for table_data in tables:
-        if table_data["raw"] and table_data["raw"][0]:
-            headers = {str(h).lower().strip() for h in table_data["raw"][0] if h}
-            if len(headers & register_headers) >= 2:
-                return True
+        if len(table_data["heuristics"].header_set & _REGISTER_HEADERS) >= 2:
+            return True
     
     return False
 
@@ -219,38 +540,156 @@ def _extract_document_hints(text: str) -> list[str]:
     Extract important document-level hints about addressing conventions,
     byte order, etc.
     """
-    hints = []
+    # Keep the first match of each pattern, reported in pattern order
+    first_matches = {}
+    for match in _ADDRESSING_RE.finditer(text):
+        index = int(match.lastgroup[1:])
+        if index not in first_matches:
+            first_matches[index] = match
+            if len(first_matches) == len(_ADDRESSING_PATTERNS):
+                break
     
-    # Look for addressing convention hints
-    addressing_patterns = [
-        (r'add\s*40[,.]?000\s*to\s*(the\s*)?address', 'PDU addressing: add 40000 to addresses'),
-        (r'pdu\s*addressing', 'Uses PDU addressing convention'),
-        (r'addresses?\s*(are|is)\s*(in\s*)?(the\s*)?range\s*(\d+)', 'Address range specified'),
-        (r'base\s*address\s*(of|is|:)?\s*(\d+)', 'Base address specified'),
-        (r'(big|little)\s*endian', 'Byte order specified'),
-        (r'word\s*swap', 'Word swapping mentioned'),
-        (r'high\s*word\s*first|low\s*word\s*first', 'Word order specified'),
-    ]
-    
-    text_lower = text.lower()
-    for pattern, hint in addressing_patterns:
-        if re.search(pattern, text_lower):
-            # Extract the actual matching text for context
-            match = re.search(pattern, text_lower)
-            if match:
-                # Get surrounding context
-                start = max(0, match.start() - 50)
-                end = min(len(text), match.end() + 100)
-                context = text[start:end].strip()
-                hints.append(f"{hint}: ...{context}...")
+    hints = []
+    for index in sorted(first_matches):
+        match = first_matches[index]
+        # Get surrounding context
+        start = max(0, match.start() - 50)
+        end = min(len(text), match.end() + 100)
+        context = text[start:end].strip()
+        hints.append(f"{_ADDRESSING_PATTERNS[index][1]}: ...{context}...")
     
     return hints
 
 
+# Page separator written by extract_text_from_pdf
+_PAGE_MARKER_RE = re.compile(r'^--- Page (\d+) ---$', re.M)
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+
+# Size of the pseudo-pages that unmarked text is packed into for scoring,
+# roughly one page of a typical manual
+_PSEUDO_PAGE_CHARS = 3000
+
+
+def _structure_pre_extracted_text(text: str) -> dict:
+    """
+    Rebuild per-page structured data from text produced by
+    extract_text_from_pdf, so pre-extracted text can be scored like PDF input.
+    
+    Text without page markers is split on blank lines and its paragraphs
+    packed into page-sized fragments, so it can still be ranked instead of
+    truncated from the front.
+    """
+    parts = _PAGE_MARKER_RE.split(text)
+    if len(parts) > 1:
+        page_texts = [(int(num), body.strip()) for num, body in zip(parts[1::2], parts[2::2])]
+    elif len(text) > _PSEUDO_PAGE_CHARS:
+        page_texts = list(enumerate(_pack_paragraphs(text, _PSEUDO_PAGE_CHARS), 1))
+    else:
+        page_texts = [(1, text)]
+    
+    structured_data = {
+        "pages": [],
+        "total_pages": len(page_texts),
+        "document_hints": []
+    }
+    for page_num, page_text in page_texts:
+        structured_data["pages"].append({
+            "page_num": page_num,
+            "text": page_text,
+            "tables": [],
+            "has_register_indicators": _has_register_indicators(page_text, [])
+        })
+        structured_data["document_hints"].extend(_extract_document_hints(page_text))
+    
+    return structured_data
+
+
+def _split_long_paragraph(paragraph: str, max_chars: int) -> list[str]:
+    """
+    Split a paragraph longer than max_chars on line boundaries into pieces
+    of at most max_chars (a single overlong line is cut at max_chars).
+    """
+    if len(paragraph) <= max_chars:
+        return [paragraph]
+    
+    pieces = []
+    current = []
+    current_length = 0
+    for line in paragraph.split("\n"):
+        if len(line) > max_chars:
+            # Flush what came before so the chopped line stays in order
+            if current:
+                pieces.append("\n".join(current))
+                current = []
+                current_length = 0
+            while len(line) > max_chars:
+                pieces.append(line[:max_chars])
+                line = line[max_chars:]
+        if current and current_length + len(line) > max_chars:
+            pieces.append("\n".join(current))
+            current = []
+            current_length = 0
+        current.append(line)
+        current_length += len(line) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def _pack_paragraphs(text: str, max_chars: int) -> list[str]:
+    """Group consecutive paragraphs of text into fragments of about max_chars."""
+    fragments = []
+    current = []
+    current_length = 0
+    paragraphs = (
+        piece
+        for paragraph in _PARAGRAPH_BREAK_RE.split(text)
+        for piece in _split_long_paragraph(paragraph.strip(), max_chars)
+    )
+    for paragraph in paragraphs:
+        if not paragraph:
+            continue
+        if current and current_length + len(paragraph) > max_chars:
+            fragments.append("\n\n".join(current))
+            current = []
+            current_length = 0
+        current.append(paragraph)
+        current_length += len(paragraph) + 2
+    if current:
+        fragments.append("\n\n".join(current))
+    return fragments
+
+
 # ============================================================================
 # Stage 2: Relevance Scoring and Chunk Selection
 # ============================================================================
 
+# Page-level bonuses (matched against lowercased text)
+_HEX_ADDR_RE = re.compile(r'0x[0-9a-f]{2,4}')
+_SCALING_RE = re.compile(r'scaling:\s*[\d./]+\s*\w+/bit')
+_OFFSET_RE = re.compile(r'offset:\s*-?[\d.]+')
+
+# Register-map-like table headers and their weights
+_HEADER_SCORES = {
+    'address': 2.5, 'register': 2.5, 'offset': 2.0, 'holding': 2.0,
+    'name': 1.0, 'parameter': 1.5, 'description': 1.0, 'desc': 1.0,
+    'type': 1.0, 'datatype': 2.0, 'data type': 2.0, 'ct': 1.0,
+    'access': 1.5, 'r/w': 2.0, 'rw': 2.0, 'read/write': 2.0,
+    'scaling': 2.0, 'resolution': 1.5, 'range': 1.0, 'unit': 0.8,
+    'sec lvl': 1.0, 'security': 0.8,
+}
+
+# Matches all header keys in one pass; values are (priority, weight)
+_HEADER_AUTOMATON = ahocorasick.Automaton()
+for _priority, (_key, _weight) in enumerate(_HEADER_SCORES.items()):
+    _HEADER_AUTOMATON.add_word(_key, (_priority, _weight))
+_HEADER_AUTOMATON.make_automaton()
+
+# Section title formats
+_SECTION_APPENDIX_RE = re.compile(r'^(APPENDIX\s+[A-Z])', re.I)
+_SECTION_CAPS_RE = re.compile(r'^(\d+\.?\d*\.?\d*\s+)?[A-Z][A-Z\s]{3,50}$')
+_SECTION_CHAPTER_RE = re.compile(r'^(Chapter|Section|Appendix)\s+\w', re.I)
+
 def score_and_rank_content(structured_data: dict) -> list[DocumentChunk]:
     """
     Score each page for relevance to Modbus register extraction.
@@ -260,18 +699,20 @@ def score_and_rank_content(structured_data: dict) -> list[DocumentChunk]:
     for page in structured_data["pages"]:
         score = 0.0
         text_content = page["text"]
+        # Lowercase once and reuse for every case-insensitive check below
+        text_lower = text_content.lower()
         
         # Base score for register indicators
         if page["has_register_indicators"]:
             score += 5.0
         
         # Score based on keyword density
-        score += _calculate_keyword_density_score(text_content)
+        score += _calculate_keyword_density_score(text_lower)
         
         # Bonus for tables with register-like structure
         table_texts = []
         for table in page["tables"]:
-            table_score = _score_table_structure(table["raw"])
+            table_score = _score_table_structure(table["heuristics"])
             score += table_score
             
             # If table looks like register map, include its text
@@ -280,7 +721,9 @@ def score_and_rank_content(structured_data: dict) -> list[DocumentChunk]:
         
         # Combine page text and high-value table text
         if table_texts:
-            text_content = text_content + "\n".join(table_texts)
+            joined_tables = "\n".join(table_texts)
+            text_content = text_content + joined_tables
+            text_lower = text_lower + joined_tables.lower()
         
         # Bonus for section titles suggesting register content
         section_title = _extract_section_title(text_content)
@@ -288,15 +731,15 @@ def score_and_rank_content(structured_data: dict) -> list[DocumentChunk]:
             title_lower = section_title.lower()
             if any(kw in title_lower for kw in ['modbus', 'register', 'appendix', 'data point']):
                 score += 4.0
-            if 'appendix' in title_lower and any(kw in text_content.lower() for kw in ['register', 'address', 'scaling']):
+            if 'appendix' in title_lower and any(kw in text_lower for kw in ['register', 'address', 'scaling']):
                 score += 6.0  # Appendix with register data is gold
         
         # Bonus for pages with hex addresses and scaling factors (typical of register tables)
-        if re.search(r'0x[0-9a-f]{2,4}', text_content.lower()):
+        if _HEX_ADDR_RE.search(text_lower):
             score += 2.0
-        if re.search(r'scaling:\s*[\d./]+\s*\w+/bit', text_content.lower()):
+        if _SCALING_RE.search(text_lower):
             score += 3.0
-        if re.search(r'offset:\s*-?[\d.]+', text_content.lower()):
+        if _OFFSET_RE.search(text_lower):
             score += 2.0
         
         chunks.append(DocumentChunk(
@@ -314,81 +757,71 @@ def score_and_rank_content(structured_data: dict) -> list[DocumentChunk]:
     return chunks
 
 
-def _calculate_keyword_density_score(text: str) -> float:
-    """Score based on presence and density of Modbus-related keywords."""
-    text_lower = text.lower()
+_DENSITY_KEYWORDS = {
+    # High value keywords
+    'modbus': 1.5, 'register': 1.0, 'holding': 0.8, 'coil': 0.8,
+    'scaling': 1.2, 'offset': 1.0, 'data range': 1.0,
+    # Medium value
+    'address': 0.5, 'uint16': 0.8, 'int16': 0.8, 'uint32': 0.8, 
+    'int32': 0.8, 'float32': 0.8, 'r/w': 0.7, 'read/write': 0.7,
+    # Protocol-specific
+    'function code': 0.6, 'fc03': 0.8, 'fc06': 0.8, 'fc16': 0.8,
+    'slave': 0.4, 'master': 0.4, 'rtu': 0.5, 'tcp/ip': 0.4,
+    # Industrial/equipment specific
+    'parameter': 0.3, 'setpoint': 0.4, 'status': 0.3,
+}
+
+# Finds every keyword occurrence in a single pass over the page text
+_KW_AUTOMATON = ahocorasick.Automaton()
+for _keyword in _DENSITY_KEYWORDS:
+    _KW_AUTOMATON.add_word(_keyword, _keyword)
+_KW_AUTOMATON.make_automaton()
+
+
+def _calculate_keyword_density_score(text_lower: str) -> float:
+    """
+    Score based on presence and density of Modbus-related keywords.
     
+    Expects already-lowercased text.
+    """
     if not text_lower.strip():
         return 0.0
     
-    keywords = {
-        # High value keywords
-        'modbus': 1.5, 'register': 1.0, 'holding': 0.8, 'coil': 0.8,
-        'scaling': 1.2, 'offset': 1.0, 'data range': 1.0,
-        # Medium value
-        'address': 0.5, 'uint16': 0.8, 'int16': 0.8, 'uint32': 0.8, 
-        'int32': 0.8, 'float32': 0.8, 'r/w': 0.7, 'read/write': 0.7,
-        # Protocol-specific
-        'function code': 0.6, 'fc03': 0.8, 'fc06': 0.8, 'fc16': 0.8,
-        'slave': 0.4, 'master': 0.4, 'rtu': 0.5, 'tcp/ip': 0.4,
-        # Industrial/equipment specific
-        'parameter': 0.3, 'setpoint': 0.4, 'status': 0.3,
-    }
+    counts = Counter(keyword for _, keyword in _KW_AUTOMATON.iter(text_lower))
     
     score = 0.0
-    for keyword, weight in keywords.items():
-        count = text_lower.count(keyword)
-        score += min(count * weight, 5.0)  # Cap contribution per keyword
+    for keyword, count in counts.items():
+        score += min(count * _DENSITY_KEYWORDS[keyword], 5.0)  # Cap contribution per keyword
     
     return score
 
 
-def _score_table_structure(table: list) -> float:
+def _score_table_structure(heuristics: TableHeuristics) -> float:
     """
     Score a table based on how likely it is to be a register map.
     """
-    if not table or len(table) < 2:
+    if heuristics.row_count < 2:
         return 0.0
     
     score = 0.0
-    headers = [str(h).lower().strip() if h else "" for h in table[0]]
-    
-    # Check for register-map-like headers
-    header_scores = {
-        'address': 2.5, 'register': 2.5, 'offset': 2.0, 'holding': 2.0,
-        'name': 1.0, 'parameter': 1.5, 'description': 1.0, 'desc': 1.0,
-        'type': 1.0, 'datatype': 2.0, 'data type': 2.0, 'ct': 1.0,
-        'access': 1.5, 'r/w': 2.0, 'rw': 2.0, 'read/write': 2.0,
-        'scaling': 2.0, 'resolution': 1.5, 'range': 1.0, 'unit': 0.8,
-        'sec lvl': 1.0, 'security': 0.8,
-    }
     
-    for header in headers:
-        for key, value in header_scores.items():
-            if key in header:
-                score += value
-                break
+    # Check for register-map-like headers; each header scores for the
+    # first key (in _HEADER_SCORES order) it contains
+    for header in heuristics.headers:
+        matches = [match for _, match in _HEADER_AUTOMATON.iter(header)]
+        if matches:
+            score += min(matches)[1]
     
     # Check if data rows contain address-like values
-    address_pattern = re.compile(r'^(0x[0-9a-f]+|[34]0[0-9]{2,4}|[0-9]{1,5})$', re.I)
-    address_like_count = 0
-    
-    for row in table[1:min(10, len(table))]:  # Check first 9 data rows
-        if row:
-            for cell in row[:3]:  # Check first 3 columns
-                if cell and address_pattern.match(str(cell).strip()):
-                    address_like_count += 1
-                    break
-    
-    if address_like_count >= 3:
+    if heuristics.address_like_count >= 3:
         score += 4.0
-    elif address_like_count >= 1:
+    elif heuristics.address_like_count >= 1:
         score += 2.0
     
     # Bonus for tables with many rows (register tables are usually large)
-    if len(table) > 20:
+    if heuristics.row_count > 20:
         score += 2.0
-    elif len(table) > 10:
+    elif heuristics.row_count > 10:
         score += 1.0
     
     return score
@@ -401,11 +834,11 @@ def _extract_section_title(text: str) -> Optional[str]:
     for line in lines:
         line = line.strip()
         # Look for numbered sections, appendix headers, or ALL CAPS titles
-        if re.match(r'^(APPENDIX\s+[A-Z])', line, re.I):
+        if _SECTION_APPENDIX_RE.match(line):
             return line
-        if re.match(r'^(\d+\.?\d*\.?\d*\s+)?[A-Z][A-Z\s]{3,50}$', line):
+        if _SECTION_CAPS_RE.match(line):
             return line
-        if re.match(r'^(Chapter|Section|Appendix)\s+\w', line, re.I):
+        if _SECTION_CHAPTER_RE.match(line):
             return line
     
     return None
@@ -415,79 +848,117 @@ def _extract_section_title(text: str) -> Optional[str]:
 # Stage 3: Smart Context Assembly
 # ============================================================================
 
+# Default context budget for one extraction, shared by single-call and
+# batched extraction
+_CONTEXT_MAX_TOKENS = 80000
+_CHARS_PER_TOKEN = 3.5
+
+_CONTEXT_SEPARATOR = "=" * 60
+_HEADER_OPEN = f"\n\n{_CONTEXT_SEPARATOR}\n"
+_HEADER_CLOSE = f"{_CONTEXT_SEPARATOR}\n"
+
+
+def _pop_best_chunks(heap: list[tuple]):
+    """Yield chunks from a heap of (-score, position, chunk), best first."""
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
 def assemble_extraction_context(
     chunks: list[DocumentChunk],
     document_hints: list[str],
-    max_tokens: int = 80000,
-    chars_per_token: float = 3.5
+    max_tokens: int = _CONTEXT_MAX_TOKENS,
+    chars_per_token: float = _CHARS_PER_TOKEN,
+    total_pages: Optional[int] = None
 ) -> tuple[str, str]:
     """
     Assemble the most relevant content within token limits,
     prioritizing high-scoring chunks.
     
+    total_pages is the page count reported in the summary when chunks
+    holds only part of the document (defaults to len(chunks)).
+    
     Returns: (context_text, chunk_info_summary)
     """
     max_chars = int(max_tokens * chars_per_token)
     
-    context_parts = []
-    current_length = 0
-    included_pages = []
+    # Context is written straight into one buffer; its position is the
+    # running size checked against the budget
+    buf = io.StringIO()
+    included_pages = array.array('i')
     
-    # Categorize chunks by relevance
-    high_relevance = [c for c in chunks if c.relevance_score > 8.0]
-    medium_relevance = [c for c in chunks if 3.0 < c.relevance_score <= 8.0]
-    low_relevance = [c for c in chunks if c.relevance_score <= 3.0]
+    # Categorize chunks by relevance in a single pass. Buckets hold
+    # (-score, position, chunk) so they can be heapified instead of sorted:
+    # the fill loops stop once the budget is spent, so usually only the best
+    # few chunks are ever ordered. Position keeps ties in document order.
+    high_relevance, medium_relevance, low_relevance = [], [], []
+    for position, chunk in enumerate(chunks):
+        score = chunk.relevance_score
+        entry = (-score, position, chunk)
+        (high_relevance if score > 8.0 else medium_relevance if score > 3.0 else low_relevance).append(entry)
+    high_count, medium_count, low_count = len(high_relevance), len(medium_relevance), len(low_relevance)
+    heapq.heapify(high_relevance)
+    heapq.heapify(medium_relevance)
     
-    logger.info(f"Chunk distribution: {len(high_relevance)} high, {len(medium_relevance)} medium, {len(low_relevance)} low relevance")
+    logger.info(f"Chunk distribution: {high_count} high, {medium_count} medium, {low_count} low relevance")
     
-    # Add document hints first (important context)
+    # Add document hints first (important context), deduplicated in
+    # document order so the prompt is stable across runs
     if document_hints:
-        hints_text = "\n[DOCUMENT ADDRESSING HINTS]\n" + "\n".join(set(document_hints)[:5]) + "\n"
-        context_parts.append(hints_text)
-        current_length += len(hints_text)
+        hints_text = "\n[DOCUMENT ADDRESSING HINTS]\n" + "\n".join(list(dict.fromkeys(document_hints))[:5]) + "\n"
+        buf.write(hints_text)
     
     # Add high relevance chunks (these contain the actual register tables)
-    for chunk in high_relevance:
-        chunk_text = f"\n\n{'='*60}\nPAGE {chunk.page_number} (Relevance: HIGH - Score: {chunk.relevance_score:.1f})\n"
+    for chunk in _pop_best_chunks(high_relevance):
+        if buf.tell() >= max_chars:
+            break
+        header = f"{_HEADER_OPEN}PAGE {chunk.page_number} (Relevance: HIGH - Score: {chunk.relevance_score:.1f})\n"
         if chunk.section_title:
-            chunk_text += f"Section: {chunk.section_title}\n"
-        chunk_text += f"{'='*60}\n{chunk.text}"
+            header += f"Section: {chunk.section_title}\n"
+        header += _HEADER_CLOSE
         
-        if current_length + len(chunk_text) <= max_chars:
-            context_parts.append(chunk_text)
-            current_length += len(chunk_text)
+        # Size header and page text together before writing anything, so
+        # chunks that don't fit are never copied
+        chunk_length = len(header) + len(chunk.text)
+        if buf.tell() + chunk_length <= max_chars:
+            buf.write(header)
+            buf.write(chunk.text)
             included_pages.append(chunk.page_number)
     
     # Add medium relevance chunks if space permits
-    for chunk in medium_relevance:
-        chunk_text = f"\n\n{'='*60}\nPAGE {chunk.page_number} (Relevance: MEDIUM)\n{'='*60}\n{chunk.text}"
+    for chunk in _pop_best_chunks(medium_relevance):
+        if buf.tell() >= max_chars * 0.85:
+            break
+        header = f"{_HEADER_OPEN}PAGE {chunk.page_number} (Relevance: MEDIUM)\n{_HEADER_CLOSE}"
         
-        if current_length + len(chunk_text) <= max_chars * 0.85:
-            context_parts.append(chunk_text)
-            current_length += len(chunk_text)
+        chunk_length = len(header) + len(chunk.text)
+        if buf.tell() + chunk_length <= max_chars * 0.85:
+            buf.write(header)
+            buf.write(chunk.text)
             included_pages.append(chunk.page_number)
     
     # If very little high-value content, add some low relevance for context
-    if len(high_relevance) < 3 and current_length < max_chars * 0.4:
-        for chunk in low_relevance[:10]:
-            chunk_text = f"\n\n--- PAGE {chunk.page_number} ---\n{chunk.text}"
-            if current_length + len(chunk_text) <= max_chars * 0.6:
-                context_parts.append(chunk_text)
-                current_length += len(chunk_text)
+    if high_count < 3 and buf.tell() < max_chars * 0.4:
+        for _, _, chunk in heapq.nsmallest(10, low_relevance):
+            header = f"\n\n--- PAGE {chunk.page_number} ---\n"
+            chunk_length = len(header) + len(chunk.text)
+            if buf.tell() + chunk_length <= max_chars * 0.6:
+                buf.write(header)
+                buf.write(chunk.text)
                 included_pages.append(chunk.page_number)
     
     # Create summary info
     chunk_info = f"""Document Analysis Summary:
-- Total pages in document: {len(chunks)}
-- High relevance pages: {len(high_relevance)} (scores > 8.0)
-- Medium relevance pages: {len(medium_relevance)} (scores 3.0-8.0)  
-- Low relevance pages: {len(low_relevance)} (scores < 3.0)
+- Total pages in document: {len(chunks) if total_pages is None else total_pages}
+- High relevance pages: {high_count} (scores > 8.0)
+- Medium relevance pages: {medium_count} (scores 3.0-8.0)  
+- Low relevance pages: {low_count} (scores < 3.0)
 - Pages included in context: {sorted(included_pages)}
-- Total context size: {current_length:,} characters"""
+- Total context size: {buf.tell():,} characters"""
     
     logger.info(chunk_info)
     
-    return "".join(context_parts), chunk_info
+    return buf.getvalue(), chunk_info
 
 
 # ============================================================================
@@ -582,35 +1053,46 @@ Return ONLY a valid JSON object with NO markdown formatting, NO code blocks, NO
 3. For state-based registers, include state definitions (e.g., "0=STOP, 1=AUTO, 2=RUN")
 4. For bitfield/alarm registers, note it's a bitmask in description
 5. Return ONLY the JSON object - no other text before or after
-6. If no registers found, return {"registers": [], "metadata": {"error": "No registers found"}}"""
+6. If no registers found, return {"registers": [], "metadata": {"error": "No registers found"}}
+
+## PROCESSING STEPS
+1. Carefully analyze ALL document content provided, focusing on HIGH relevance pages
+2. Extract every Modbus register you can identify
+3. Apply address standardization (add 40000 if using raw addresses)
+4. Include scaling, offset, range, and state information in descriptions
+5. Return ONLY the JSON object with registers array and metadata"""
 
 
 def create_extraction_prompt(context: str, chunk_info: str) -> str:
-    """Create the user prompt with assembled context."""
+    """
+    Create the user prompt with assembled context.
+    
+    Contains only per-document content; all static instructions live in
+    SYSTEM_PROMPT so the prompt prefix stays identical (and cacheable)
+    across requests.
+    """
     return f"""## DOCUMENT ANALYSIS
 
 {chunk_info}
 
 ## EXTRACTED DOCUMENT CONTENT (Prioritized by relevance)
 
-{context}
-
-## INSTRUCTIONS
-1. Carefully analyze ALL content above, focusing on HIGH relevance pages
-2. Extract every Modbus register you can identify
-3. Apply address standardization (add 40000 if using raw addresses)
-4. Include scaling, offset, range, and state information in descriptions
-5. Return ONLY the JSON object with registers array and metadata"""
+{context}"""
 
 
 # ============================================================================
 # Stage 5: AI Client and API Calls
 # ============================================================================
 
+@functools.lru_cache(maxsize=1)
 def _get_ai_client():
     """
     Get the appropriate AI client based on available API keys.
     Returns tuple of (client_type, client)
+    
+    The client is created once and reused, so repeated extractions share
+    one pooled HTTP/2 connection instead of re-importing the SDK and
+    re-negotiating TLS on every call.
     """
     anthropic_key = os.getenv("ANTHROPIC_API_KEY")
     openai_key = os.getenv("OPENAI_API_KEY")
@@ -618,7 +1100,11 @@ def _get_ai_client():
     if anthropic_key:
         try:
             import anthropic
-            client = anthropic.Anthropic(api_key=anthropic_key)
+            client = anthropic.Anthropic(
+                api_key=anthropic_key,
+                http_client=_create_http_client(),
+                max_retries=0
+            )
             return ("anthropic", client)
         except ImportError:
             logger.warning("Anthropic package not installed")
@@ -626,7 +1112,11 @@ def _get_ai_client():
     if openai_key:
         try:
             import openai
-            client = openai.OpenAI(api_key=openai_key)
+            client = openai.OpenAI(
+                api_key=openai_key,
+                http_client=_create_http_client(),
+                max_retries=0
+            )
             return ("openai", client)
         except ImportError:
             logger.warning("OpenAI package not installed")
@@ -636,62 +1126,325 @@ def _get_ai_client():
     )
 
 
-def _call_anthropic(client, system_prompt: str, user_prompt: str) -> str:
-    """Make API call to Anthropic Claude."""
-    message = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=16384,
-        system=system_prompt,
-        messages=[
+def _create_http_client():
+    """Create a keep-alive HTTP/2 client shared by all API calls."""
+    import httpx
+    return httpx.Client(
+        http2=True,
+        timeout=httpx.Timeout(600.0, connect=10.0),
+        limits=httpx.Limits(max_keepalive_connections=10)
+    )
+
+
+def _create_async_ai_client():
+    """
+    Create an async AI client based on available API keys.
+    Returns tuple of (client_type, client)
+    
+    Not memoized: async connection pools are bound to the event loop they
+    were opened on, so callers create one per batch and close it after.
+    """
+    anthropic_key = os.getenv("ANTHROPIC_API_KEY")
+    openai_key = os.getenv("OPENAI_API_KEY")
+    
+    if anthropic_key:
+        try:
+            import anthropic
+            return ("anthropic", anthropic.AsyncAnthropic(api_key=anthropic_key, max_retries=0))
+        except ImportError:
+            logger.warning("Anthropic package not installed")
+    
+    if openai_key:
+        try:
+            import openai
+            return ("openai", openai.AsyncOpenAI(api_key=openai_key, max_retries=0))
+        except ImportError:
+            logger.warning("OpenAI package not installed")
+    
+    raise ValueError(
+        "No AI API key configured. Please set ANTHROPIC_API_KEY or OPENAI_API_KEY environment variable."
+    )
+
+
+def _anthropic_request(system_prompt: str, user_prompt: str, prefill: Optional[str] = None) -> dict:
+    """
+    Build messages.create arguments for Anthropic Claude.
+    
+    If prefill is given it is sent as the start of the assistant's reply,
+    and the model continues from the end of it.
+    """
+    # The system prompt is static, so mark it as a cache breakpoint and keep
+    # the per-document content in the user message after it.
+    request = {
+        "model": ANTHROPIC_MODEL,
+        "max_tokens": 16384,
+        "system": [
+            {
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }
+        ],
+        "messages": [
             {
                 "role": "user",
                 "content": user_prompt
             }
-        ]
+        ],
+        "extra_headers": {"anthropic-beta": "prompt-caching-2024-07-31"}
+    }
+    if prefill:
+        request["messages"].append({"role": "assistant", "content": prefill})
+    return request
+
+
+def _anthropic_response_text(message) -> str:
+    """Log prompt cache usage and return the text of an Anthropic message."""
+    logger.info(
+        f"Anthropic prompt cache: {getattr(message.usage, 'cache_read_input_tokens', 0) or 0} tokens read, "
+        f"{getattr(message.usage, 'cache_creation_input_tokens', 0) or 0} tokens written"
     )
     return message.content[0].text
 
 
-def _call_openai(client, system_prompt: str, user_prompt: str) -> str:
-    """Make API call to OpenAI."""
-    response = client.chat.completions.create(
-        model="gpt-4-turbo-preview",
-        max_tokens=16384,
-        response_format={"type": "json_object"},
-        messages=[
+_OPENAI_PROMPT_CACHE_KEY = "modmapper-register-extraction"
+
+
+def _openai_request(system_prompt: str, user_prompt: str) -> dict:
+    """Build chat.completions.create arguments for OpenAI."""
+    return {
+        "model": OPENAI_MODEL,
+        "max_tokens": 16384,
+        "response_format": {"type": "json_object"},
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
-        ]
-    )
+        ],
+        # Route requests sharing the static system prompt to the same
+        # prompt cache
+        "extra_body": {"prompt_cache_key": _OPENAI_PROMPT_CACHE_KEY}
+    }
+
+
+def _is_retryable_api_error(exc: BaseException) -> bool:
+    """Check for transient API errors (rate limits, overload, 5xx, network)."""
+    status_code = getattr(exc, "status_code", None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+# Retries only the API request, so a transient failure doesn't force the
+# PDF to be re-extracted. Works for both sync and async callables.
+_api_retry = retry(
+    stop=stop_after_attempt(4),
+    wait=wait_exponential(multiplier=1, min=1, max=30),
+    retry=retry_if_exception(_is_retryable_api_error),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+
+
+# Follow-up requests allowed when a response is cut off at max_tokens
+_MAX_CONTINUATIONS = 2
+
+
+def _continuation_prefix(text: str) -> Optional[tuple[str, str]]:
+    """
+    Cut a truncated JSON response after its last complete array element
+    (normally the last whole register), or return None if there is none.
+    
+    Returns: (prefix, closing) where closing is the brackets that close
+    every array/object still open at the end of prefix
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    end = None
+    open_at_end = []
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append(ch)
+        elif ch in '}]' and stack:
+            stack.pop()
+            # Only elements of the outermost array count, so a register is
+            # never cut inside a nested value
+            if ch == '}' and stack and stack[-1] == '[' and stack.count('[') == 1:
+                end = i + 1
+                open_at_end = stack.copy()
+    if end is None:
+        return None
+    closing = "".join("]" if ch == "[" else "}" for ch in reversed(open_at_end))
+    return text[:end], closing
+
+
+def _next_continuation(text: str, message) -> Optional[tuple[str, str]]:
+    """
+    Return (prefix, closing) to continue a truncated Anthropic response
+    from, or None if the response is complete or cannot be continued.
+    """
+    if message.stop_reason != "max_tokens":
+        return None
+    continuation = _continuation_prefix(text)
+    if continuation is None:
+        logger.warning("Anthropic response truncated before any complete register")
+    else:
+        logger.info(f"Anthropic response truncated at max_tokens, continuing after {len(continuation[0])} characters")
+    return continuation
+
+
+@_api_retry
+def _create_anthropic_message(client, request: dict):
+    """Send one messages.create request."""
+    return client.messages.create(**request)
+
+
+def _call_anthropic(client, system_prompt: str, user_prompt: str) -> str:
+    """
+    Make API call to Anthropic Claude.
+    
+    A response cut off at max_tokens is continued from its last complete
+    register rather than re-requested from scratch.
+    """
+    text = ""
+    closing = ""
+    for _ in range(_MAX_CONTINUATIONS + 1):
+        message = _create_anthropic_message(client, _anthropic_request(system_prompt, user_prompt, text))
+        text += _anthropic_response_text(message)
+        continuation = _next_continuation(text, message)
+        if continuation is None:
+            return text
+        text, closing = continuation
+    # Close the registers received so far so they still parse
+    logger.warning(f"Anthropic response still truncated after {_MAX_CONTINUATIONS} continuations")
+    return text + closing
+
+
+@_api_retry
+def _call_openai(client, system_prompt: str, user_prompt: str) -> str:
+    """Make API call to OpenAI."""
+    response = client.chat.completions.create(**_openai_request(system_prompt, user_prompt))
     return response.choices[0].message.content
 
 
-def _extract_json_from_response(response: str) -> dict:
+@_api_retry
+async def _create_anthropic_message_async(client, request: dict):
+    """Send one messages.create request on an async client."""
+    return await client.messages.create(**request)
+
+
+async def _call_anthropic_async(client, system_prompt: str, user_prompt: str) -> str:
+    """Make async API call to Anthropic Claude, continuing truncated responses."""
+    text = ""
+    closing = ""
+    for _ in range(_MAX_CONTINUATIONS + 1):
+        message = await _create_anthropic_message_async(client, _anthropic_request(system_prompt, user_prompt, text))
+        text += _anthropic_response_text(message)
+        continuation = _next_continuation(text, message)
+        if continuation is None:
+            return text
+        text, closing = continuation
+    # Close the registers received so far so they still parse
+    logger.warning(f"Anthropic response still truncated after {_MAX_CONTINUATIONS} continuations")
+    return text + closing
+
+
+@_api_retry
+async def _call_openai_async(client, system_prompt: str, user_prompt: str) -> str:
+    """Make async API call to OpenAI."""
+    response = await client.chat.completions.create(**_openai_request(system_prompt, user_prompt))
+    return response.choices[0].message.content
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _find_json_object_end(text: str, start: int) -> int:
+    """
+    Return the index just past the brace-balanced object opening at
+    text[start], or -1 if it is never closed. Braces inside strings are
+    ignored.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+
+def _extract_json_from_response(response: str, client_type: str = "anthropic") -> dict:
     """
     Extract JSON from AI response, handling potential markdown formatting.
+    
+    OpenAI responses are requested in JSON mode and parsed directly;
+    Anthropic responses are scanned for the first JSON object holding
+    "registers" in a single linear pass.
     """
+    if client_type == "openai":
+        try:
+            return orjson.loads(response)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"Could not extract valid JSON from AI response: {e}")
+    
     # Try direct JSON parse first
-    try:
-        return json.loads(response)
-    except json.JSONDecodeError:
-        pass
-    
-    # Try to find JSON in markdown code blocks
-    json_patterns = [
-        r'```json\s*([\s\S]*?)\s*```',
-        r'```\s*([\s\S]*?)\s*```',
-        r'\{[\s\S]*"registers"[\s\S]*\}'
-    ]
-    
-    for pattern in json_patterns:
-        match = re.search(pattern, response)
-        if match:
-            try:
-                json_str = match.group(1) if '```' in pattern else match.group(0)
-                return json.loads(json_str)
-            except (json.JSONDecodeError, IndexError):
-                continue
+    response = response.strip()
+    if response.startswith('{'):
+        try:
+            return orjson.loads(response)
+        except orjson.JSONDecodeError:
+            pass
+    
+    # Narrow to the markdown code block if there is one
+    fence_start = response.find("```")
+    fence_end = response.rfind("```")
+    if fence_start != -1 and fence_end > fence_start:
+        response = response[fence_start + 3:fence_end]
     
+    # Decode objects left to right, skipping past any that fail to parse
+    fallback = None
+    start = response.find('{')
+    while start != -1:
+        try:
+            obj, end = _JSON_DECODER.raw_decode(response, start)
+        except json.JSONDecodeError:
+            end = _find_json_object_end(response, start)
+            if end == -1:
+                break
+        else:
+            if isinstance(obj, dict):
+                if "registers" in obj:
+                    return obj
+                if fallback is None:
+                    fallback = obj
+        start = response.find('{', end)
+    
+    if fallback is not None:
+        return fallback
     raise ValueError("Could not extract valid JSON from AI response")
 
 
@@ -706,7 +1459,8 @@ def validate_and_deduplicate(registers: list[dict]) -> list[dict]:
     - Validate addresses
     - Sort by address
     """
-    seen_addresses = {}
+    # Best entry per address as (info score, register), in one pass
+    best = {}
     
     for reg in registers:
         addr = reg.get("address", 0)
@@ -716,20 +1470,13 @@ def validate_and_deduplicate(registers: list[dict]) -> list[dict]:
             continue
         
         # Handle duplicates - keep the one with more information
-        if addr in seen_addresses:
-            existing = seen_addresses[addr]
-            # Keep entry with longer description or more complete data
-            existing_score = len(existing.get("description", "")) + len(existing.get("name", ""))
-            new_score = len(reg.get("description", "")) + len(reg.get("name", ""))
-            if new_score > existing_score:
-                seen_addresses[addr] = reg
-        else:
-            seen_addresses[addr] = reg
-    
-    # Sort by address
-    cleaned = sorted(seen_addresses.values(), key=lambda x: x["address"])
+        score = len(reg.get("description", "")) + len(reg.get("name", ""))
+        existing = best.get(addr)
+        if existing is None or score > existing[0]:
+            best[addr] = (score, reg)
     
-    return cleaned
+    # Sort by address (keys are unique, so registers are never compared)
+    return [reg for _, (_, reg) in sorted(best.items())]
 
 
 # ============================================================================
@@ -741,44 +1488,65 @@ def extract_text_from_pdf(file_content: bytes) -> str:
     Legacy function - extracts raw text from PDF.
     For new code, use ai_parse_data which handles everything.
     """
-    text_parts = []
+    try:
+        page_results = _get_page_results(file_content)
+    except Exception as e:
+        logger.error(f"Error extracting text: {e}")
+        raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+    
+    # Write straight into one buffer instead of building per-page strings
+    buf = io.StringIO()
     
     try:
-        with pdfplumber.open(BytesIO(file_content)) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_text = page.extract_text() or ""
-                tables = page.extract_tables()
-                
-                table_text = ""
-                for table in tables:
-                    if table:
-                        for row in table:
-                            if row:
-                                row_text = " | ".join(str(cell) if cell else "" for cell in row)
-                                table_text += row_text + "\n"
+        with contextlib.ExitStack() as stack:
+            pdf = None
+            for page_data, _ in page_results:
+                if page_data["page_num"] > 1:
+                    buf.write("\n")
+                buf.write("\n--- Page ")
+                buf.write(str(page_data["page_num"]))
+                buf.write(" ---\n")
+                buf.write(page_data["text"])
+                buf.write("\n")
                 
-                combined = f"\n--- Page {page_num} ---\n{page_text}\n"
-                if table_text:
-                    combined += f"\n[TABLE]\n{table_text}\n"
-                
-                text_parts.append(combined)
+                # This output includes every table, so pages the table probe
+                # skipped are run through pdfplumber here
+                raw_tables = page_data["raw_tables"]
+                if raw_tables is None:
+                    if pdf is None:
+                        pdf = stack.enter_context(pdfplumber.open(BytesIO(file_content)))
+                    raw_tables = _extract_page_tables(pdf.pages[page_data["page_num"] - 1])
                 
+                rows = [row for table in raw_tables if table for row in table if row]
+                if rows:
+                    buf.write("\n[TABLE]\n")
+                    for row in rows:
+                        buf.write(" | ".join(str(cell) if cell else "" for cell in row))
+                        buf.write("\n")
+                    buf.write("\n")
     except Exception as e:
         logger.error(f"Error extracting text: {e}")
         raise ValueError(f"Failed to extract text from PDF: {str(e)}")
     
-    return "\n".join(text_parts)
+    return buf.getvalue()
 
 
-def ai_parse_data(text_or_bytes) -> ModbusRegisterTable:
+# When more pages than this are high relevance, extraction is split into
+# concurrent calls over batches of (at least) this many contiguous pages
+_PAGES_PER_BATCH = 4
+
+# Upper bound on batched calls per document; batches grow beyond
+# _PAGES_PER_BATCH pages to stay within it
+_MAX_BATCHES = 8
+
+# Maximum number of concurrent API calls for a single document
+_MAX_CONCURRENT_CALLS = 8
+
+
+def _build_user_prompts(text_or_bytes) -> list[str]:
     """
-    Main extraction function using intelligent document processing.
-    
-    Args:
-        text_or_bytes: Either raw PDF bytes or pre-extracted text
-        
-    Returns:
-        ModbusRegisterTable with validated register data
+    Run document extraction, scoring and context assembly, and build the
+    user prompt(s) for the LLM.
     """
     # If we received bytes, use the intelligent extraction pipeline
     if isinstance(text_or_bytes, bytes):
@@ -790,90 +1558,300 @@ def ai_parse_data(text_or_bytes) -> ModbusRegisterTable:
         # Stage 2: Score and rank pages
         chunks = score_and_rank_content(structured_data)
         
-        # Stage 3: Assemble context
-        context, chunk_info = assemble_extraction_context(
-            chunks, 
-            structured_data.get("document_hints", [])
-        )
+        # Stages 3-4: Assemble context and create prompts
+        return _prompts_for_chunks(chunks, structured_data.get("document_hints", []))
+    
+    # Legacy path: text was pre-extracted
+    logger.info("Using legacy text extraction path...")
+    text = text_or_bytes
+    
+    structured_data = _structure_pre_extracted_text(text)
+    
+    if structured_data["total_pages"] > 1:
+        # Score the pages and keep the most relevant ones within budget,
+        # rather than the first N characters
+        chunks = score_and_rank_content(structured_data)
+        return _prompts_for_chunks(chunks, structured_data["document_hints"])
+    
+    # A single block with no pages or paragraphs to rank - truncate if too long
+    max_chars = 200000
+    if len(text) > max_chars:
+        logger.warning(f"Text truncated from {len(text)} to {max_chars} characters")
+        text = text[:max_chars]
+    
+    chunk_info = f"Pre-extracted text: {len(text)} characters"
+    return [create_extraction_prompt(text, chunk_info)]
+
+
+def _prompts_for_chunks(chunks: list[DocumentChunk], document_hints: list[str]) -> list[str]:
+    """
+    Assemble context for scored chunks and create the user prompts.
+    
+    Documents with many high relevance pages get one prompt per batch of
+    contiguous pages, so several smaller calls run concurrently instead of
+    one very long call that risks truncating its output. Medium relevance
+    pages are batched in page order alongside them, since they are often
+    table continuations without a header row.
+    
+    Pages are first selected within the same character budget as a single
+    call, best first, so batching never sends more content than one call
+    would; the selection is then split into at most _MAX_BATCHES batches.
+    """
+    high_count = sum(1 for c in chunks if c.relevance_score > 8.0)
+    
+    if high_count <= _PAGES_PER_BATCH:
+        context, chunk_info = assemble_extraction_context(chunks, document_hints)
+        return [create_extraction_prompt(context, chunk_info)]
+    
+    # Same greedy fill as assemble_extraction_context: high relevance pages
+    # up to the full budget, then medium ones up to 85% of it
+    max_chars = int(_CONTEXT_MAX_TOKENS * _CHARS_PER_TOKEN)
+    relevant = []
+    used = 0
+    for chunk in sorted(chunks, key=lambda c: -c.relevance_score):
+        if chunk.relevance_score <= 3.0:
+            break
+        limit = max_chars if chunk.relevance_score > 8.0 else max_chars * 0.85
+        if used + len(chunk.text) <= limit:
+            relevant.append(chunk)
+            used += len(chunk.text)
+    relevant.sort(key=lambda c: c.page_number)
+    
+    pages_per_batch = max(_PAGES_PER_BATCH, -(-len(relevant) // _MAX_BATCHES))
+    prompts = []
+    for start in range(0, len(relevant), pages_per_batch):
+        batch = relevant[start:start + pages_per_batch]
+        context, chunk_info = assemble_extraction_context(batch, document_hints, total_pages=len(chunks))
+        prompts.append(create_extraction_prompt(context, chunk_info))
+    
+    logger.info(f"Split {len(relevant)} high and medium relevance pages into {len(prompts)} extraction batches")
+    return prompts
+
+
+def _parse_ai_responses(responses: list[str], client_type: str) -> ModbusRegisterTable:
+    """Extract, merge, deduplicate and validate registers from AI responses."""
+    try:
+        raw_registers = []
+        metadata = {}
+        for response in responses:
+            data = _extract_json_from_response(response, client_type)
+            raw_registers.extend(data.get("registers", []))
+            for key, value in data.get("metadata", {}).items():
+                metadata.setdefault(key, value)
         
-        # Stage 4: Create prompts
-        user_prompt = create_extraction_prompt(context, chunk_info)
+        # Validate and deduplicate registers (batches may overlap)
+        cleaned_registers = validate_and_deduplicate(raw_registers)
         
-    else:
-        # Legacy path: text was pre-extracted
-        logger.info("Using legacy text extraction path...")
-        text = text_or_bytes
+        # Create validated response
+        register_table = _TABLE_ADAPTER.validate_python({
+            "registers": cleaned_registers,
+            "metadata": metadata
+        })
         
-        # Truncate if too long
-        max_chars = 200000
-        if len(text) > max_chars:
-            logger.warning(f"Text truncated from {len(text)} to {max_chars} characters")
-            text = text[:max_chars]
+        logger.info(f"Successfully extracted {len(register_table.registers)} registers")
+        return register_table
+        
+    except Exception as e:
+        logger.error(f"Failed to validate AI response: {e}")
+        raise ValueError(f"Failed to parse AI response: {str(e)}")
+
+
+def ai_parse_data(text_or_bytes) -> ModbusRegisterTable:
+    """
+    Main extraction function using intelligent document processing.
+    
+    Args:
+        text_or_bytes: Either raw PDF bytes or pre-extracted text
         
-        chunk_info = f"Pre-extracted text: {len(text)} characters"
-        user_prompt = create_extraction_prompt(text, chunk_info)
+    Returns:
+        ModbusRegisterTable with validated register data
+    """
+    user_prompts = _build_user_prompts(text_or_bytes)
     
     # Get AI client
     client_type, client = _get_ai_client()
     logger.info(f"Using {client_type} API for parsing")
+    call_api = _call_anthropic if client_type == "anthropic" else _call_openai
     
-    # Make API call
+    # Make API call(s); batches share the pooled client across threads
     try:
-        if client_type == "anthropic":
-            response = _call_anthropic(client, SYSTEM_PROMPT, user_prompt)
+        if len(user_prompts) == 1:
+            responses = [call_api(client, SYSTEM_PROMPT, user_prompts[0])]
         else:
-            response = _call_openai(client, SYSTEM_PROMPT, user_prompt)
+            with ThreadPoolExecutor(max_workers=min(len(user_prompts), _MAX_CONCURRENT_CALLS)) as executor:
+                responses = list(executor.map(
+                    lambda user_prompt: call_api(client, SYSTEM_PROMPT, user_prompt),
+                    user_prompts
+                ))
     except Exception as e:
         logger.error(f"AI API call failed: {e}")
         raise ValueError(f"AI parsing failed: {str(e)}")
     
     # Extract and validate JSON
-    try:
-        data = _extract_json_from_response(response)
+    return _parse_ai_responses(responses, client_type)
+
+
+async def ai_parse_data_async(
+    text_or_bytes,
+    ai_client=None,
+    call_semaphore: Optional[asyncio.Semaphore] = None
+) -> ModbusRegisterTable:
+    """
+    Async version of ai_parse_data.
+    
+    PDF extraction runs in a worker thread so it does not block the event
+    loop; the API call(s) are awaited concurrently.
+    
+    Args:
+        text_or_bytes: Either raw PDF bytes or pre-extracted text
+        ai_client: Optional (client_type, client) tuple from
+            _create_async_ai_client, shared across a batch
+        call_semaphore: Optional semaphore bounding concurrent API calls,
+            shared across a batch so the bound covers every document
         
-        # Validate and deduplicate registers
-        raw_registers = data.get("registers", [])
-        cleaned_registers = validate_and_deduplicate(raw_registers)
+    Returns:
+        ModbusRegisterTable with validated register data
+    """
+    user_prompts = await asyncio.to_thread(_build_user_prompts, text_or_bytes)
+    
+    owns_client = ai_client is None
+    client_type, client = ai_client if ai_client else _create_async_ai_client()
+    logger.info(f"Using {client_type} API for parsing")
+    call_api = _call_anthropic_async if client_type == "anthropic" else _call_openai_async
+    semaphore = call_semaphore or asyncio.Semaphore(_MAX_CONCURRENT_CALLS)
+    
+    async def call_one(user_prompt: str) -> str:
+        async with semaphore:
+            return await call_api(client, SYSTEM_PROMPT, user_prompt)
+    
+    # Make API call(s)
+    try:
+        responses = await asyncio.gather(*(call_one(p) for p in user_prompts))
+    except Exception as e:
+        logger.error(f"AI API call failed: {e}")
+        raise ValueError(f"AI parsing failed: {str(e)}")
+    finally:
+        if owns_client:
+            await client.close()
+    
+    # Extract and validate JSON
+    return _parse_ai_responses(responses, client_type)
+
+
+async def extract_batch(files: list[bytes], max_concurrency: int = 8) -> list[ModbusRegisterTable]:
+    """
+    Extract registers from several PDFs concurrently.
+    
+    Args:
+        files: Raw bytes of each PDF file
+        max_concurrency: Maximum number of documents, and of API calls
+            across all documents, in flight at once, to stay within API
+            rate limits
         
-        # Create validated response
-        register_table = ModbusRegisterTable(
-            registers=[ModbusRegister(**reg) for reg in cleaned_registers],
-            metadata=data.get("metadata", {})
-        )
+    Returns:
+        One ModbusRegisterTable per file, in input order
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    call_semaphore = asyncio.Semaphore(max_concurrency)
+    ai_client = _create_async_ai_client()
+    
+    async def extract_one(file_content: bytes) -> ModbusRegisterTable:
+        async with semaphore:
+            return await ai_parse_data_async(file_content, ai_client, call_semaphore)
+    
+    try:
+        return await asyncio.gather(*(extract_one(f) for f in files))
+    finally:
+        await ai_client[1].close()
+
+
+def _result_cache_path(file_content: bytes, model: str) -> Path:
+    """Get the cache file path for a PDF parsed with the given model."""
+    digest = hashlib.sha256(file_content)
+    digest.update(model.encode("utf-8"))
+    digest.update(f"v{_RESULT_CACHE_VERSION}".encode("utf-8"))
+    digest.update(SYSTEM_PROMPT.encode("utf-8"))
+    return _cache_dir / f"{digest.hexdigest()}.json"
+
+
+def extract_registers(file_content: bytes, force_refresh: bool = False) -> ModbusRegisterTable:
+    """
+    Extract registers from PDF bytes, reusing a cached result when the same
+    file has already been parsed with the current model.
+    
+    Args:
+        file_content: Raw bytes of the PDF file
+        force_refresh: Ignore any cached result and re-run the full pipeline
         
-        logger.info(f"Successfully extracted {len(register_table.registers)} registers")
+    Returns:
+        ModbusRegisterTable with validated register data
+    """
+    client_type, _ = _get_ai_client()
+    model = ANTHROPIC_MODEL if client_type == "anthropic" else OPENAI_MODEL
+    cache_path = _result_cache_path(file_content, model)
+    
+    if not force_refresh and cache_path.exists():
+        try:
+            register_table = ModbusRegisterTable.model_validate_json(cache_path.read_text())
+            logger.info(f"Loaded {len(register_table.registers)} registers from cache ({cache_path.name})")
+            return register_table
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {cache_path}: {e}")
+    
+    register_table = ai_parse_data(file_content)
+    
+    # Don't pin an empty result: extraction is nondeterministic and a retry
+    # may find registers
+    if not register_table.registers:
         return register_table
-        
-    except Exception as e:
-        logger.error(f"Failed to validate AI response: {e}")
-        raise ValueError(f"Failed to parse AI response: {str(e)}")
+    
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(register_table.model_dump_json())
+    except OSError as e:
+        logger.warning(f"Could not write result cache {cache_path}: {e}")
+    
+    return register_table
 
 
 # ============================================================================
 # Utility Functions for Export
 # ============================================================================
 
-def registers_to_csv(registers: list[ModbusRegister]) -> str:
-    """Convert registers to CSV format."""
-    lines = ["address,name,datatype,description,writable"]
-    
-    for reg in registers:
-        desc = reg.description.replace('"', '""')
-        if ',' in desc or '"' in desc or '\n' in desc:
-            desc = f'"{desc}"'
-        
-        name = reg.name.replace('"', '""')
-        if ',' in name or '"' in name:
-            name = f'"{name}"'
-            
-        lines.append(f"{reg.address},{name},{reg.datatype},{desc},{str(reg.writable).lower()}")
+def registers_to_csv(registers: Union[list[ModbusRegister], list[dict]]) -> str:
+    """
+    Convert registers to CSV format.
     
-    return "\n".join(lines)
+    Accepts either ModbusRegister objects or their model_dump() dicts, so
+    callers that already dumped the registers don't walk the models again.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+    writer.writerow(["address", "name", "datatype", "description", "writable"])
+    if registers and isinstance(registers[0], dict):
+        writer.writerows(
+            (reg["address"], reg["name"], reg["datatype"], reg["description"], str(reg["writable"]).lower())
+            for reg in registers
+        )
+    else:
+        writer.writerows(
+            (reg.address, reg.name, reg.datatype, reg.description, str(reg.writable).lower())
+            for reg in registers
+        )
+    return buf.getvalue()
 
 
-def registers_to_json(registers: list[ModbusRegister]) -> str:
-    """Convert registers to formatted JSON string."""
-    data = {
-        "registers": [reg.model_dump() for reg in registers]
-    }
-    return json.dumps(data, indent=2)
+# Serializes straight from model instances in pydantic-core, without
+# building an intermediate dict per register
+_REGISTERS_JSON_ADAPTER = TypeAdapter(dict[str, list[ModbusRegister]])
+
+
+def registers_to_json(registers: Union[list[ModbusRegister], list[dict]]) -> str:
+    """
+    Convert registers to formatted JSON string.
+    
+    Accepts either ModbusRegister objects or their model_dump() dicts.
+    """
+    if registers and isinstance(registers[0], dict):
+        return orjson.dumps({"registers": registers}, option=orjson.OPT_INDENT_2).decode()
+    return _REGISTERS_JSON_ADAPTER.dump_json({"registers": registers}, indent=2).decode()
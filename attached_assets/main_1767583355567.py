@@ -6,11 +6,12 @@ using AI-powered parsing and provides standardized JSON/CSV output.
 """
 
 import os
+import asyncio
 import logging
 from typing import Optional
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
@@ -38,7 +39,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Modbus Manual Parser",
     description="Extract and standardize Modbus register tables from PDF manuals",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Setup templates directory
@@ -112,7 +114,9 @@ async def parse_pdf(file: UploadFile = File(...)):
     try:
         # Step 1: Extract text from PDF
         logger.info("Extracting text from PDF...")
-        extracted_text = extract_text_from_pdf(content)
+        # PDF parsing and the LLM call are blocking; run them off the event
+        # loop so other requests keep being served meanwhile.
+        extracted_text = await asyncio.to_thread(extract_text_from_pdf, content)
         
         if not extracted_text.strip():
             raise HTTPException(
@@ -122,7 +126,7 @@ async def parse_pdf(file: UploadFile = File(...)):
         
         # Step 2: Use AI to parse the register table
         logger.info("Parsing register data with AI...")
-        register_table = ai_parse_data(extracted_text)
+        register_table = await asyncio.to_thread(ai_parse_data, extracted_text)
         
         if not register_table.registers:
             return ParseResponse(
@@ -135,8 +139,8 @@ async def parse_pdf(file: UploadFile = File(...)):
         
         # Step 3: Prepare response data
         registers_dict = [reg.model_dump() for reg in register_table.registers]
-        csv_data = registers_to_csv(register_table.registers)
-        json_data = registers_to_json(register_table.registers)
+        csv_data = registers_to_csv(registers_dict)
+        json_data = registers_to_json(registers_dict)
         
         logger.info(f"Successfully extracted {len(registers_dict)} registers")
         
@@ -173,7 +177,7 @@ async def health_check():
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom HTTP exception handler."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
@@ -187,7 +191,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 async def general_exception_handler(request: Request, exc: Exception):
     """General exception handler for unexpected errors."""
     logger.exception(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
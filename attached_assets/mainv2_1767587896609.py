@@ -6,17 +6,18 @@ using AI-powered parsing and provides standardized JSON/CSV output.
 """
 
 import os
+import asyncio
 import logging
 from typing import Optional
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 
 from extractor import (
-    ai_parse_data,
+    extract_registers,
     registers_to_csv,
     registers_to_json,
     ModbusRegister,
@@ -37,9 +38,13 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Modbus Manual Parser",
     description="Extract and standardize Modbus register tables from PDF manuals",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Upload limit
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB
+
 # Setup templates directory
 templates = Jinja2Templates(directory="templates")
 
@@ -77,12 +82,13 @@ async def index(request: Request):
 
 
 @app.post("/parse", response_model=ParseResponse)
-async def parse_pdf(file: UploadFile = File(...)):
+async def parse_pdf(file: UploadFile = File(...), force_refresh: bool = False):
     """
     Parse a PDF file and extract Modbus register table.
     
     Args:
         file: Uploaded PDF file
+        force_refresh: Re-run extraction even if a cached result exists
         
     Returns:
         ParseResponse with extracted registers and download data
@@ -97,10 +103,15 @@ async def parse_pdf(file: UploadFile = File(...)):
             detail="Invalid file type. Please upload a PDF file."
         )
     
-    # Check file size (max 50MB)
+    # Check file size (max 50MB). The upload is already spooled by the time
+    # the handler runs, so check its size before reading it into memory.
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size is 50MB."
+        )
     content = await file.read()
-    max_size = 50 * 1024 * 1024  # 50MB
-    if len(content) > max_size:
+    if len(content) > MAX_UPLOAD_SIZE:
         raise HTTPException(
             status_code=400,
             detail=f"File too large. Maximum size is 50MB."
@@ -111,7 +122,8 @@ async def parse_pdf(file: UploadFile = File(...)):
     try:
         # Use intelligent extraction pipeline (pass raw bytes)
         logger.info("Starting intelligent extraction pipeline...")
-        register_table = ai_parse_data(content)
+        # Extraction is CPU and network bound, so keep it off the event loop
+        register_table = await asyncio.to_thread(extract_registers, content, force_refresh)
         
         if not register_table.registers:
             return ParseResponse(
@@ -122,10 +134,11 @@ async def parse_pdf(file: UploadFile = File(...)):
                 json_data='{"registers": []}'
             )
         
-        # Step 3: Prepare response data
+        # Step 3: Prepare response data (dump the models once and serialize
+        # the dicts)
         registers_dict = [reg.model_dump() for reg in register_table.registers]
-        csv_data = registers_to_csv(register_table.registers)
-        json_data = registers_to_json(register_table.registers)
+        csv_data = registers_to_csv(registers_dict)
+        json_data = registers_to_json(registers_dict)
         
         logger.info(f"Successfully extracted {len(registers_dict)} registers")
         
@@ -162,7 +175,7 @@ async def health_check():
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom HTTP exception handler."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
@@ -176,7 +189,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 async def general_exception_handler(request: Request, exc: Exception):
     """General exception handler for unexpected errors."""
     logger.exception(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -0,0 +1,37 @@
+"""Regression tests for context assembly in the v2 extractor (no PDF or API key needed)."""
+
+import importlib.util
+from pathlib import Path
+
+_spec = importlib.util.spec_from_file_location(
+    "extractor", Path(__file__).with_name("extractorv2_1767587896596.py")
+)
+extractor = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(extractor)
+
+
+def _chunks():
+    return [
+        extractor.DocumentChunk(text="Register map 0x0001", page_number=1, relevance_score=12.0),
+        extractor.DocumentChunk(text="Scaling notes", page_number=2, relevance_score=5.0),
+        extractor.DocumentChunk(text="Safety information", page_number=3, relevance_score=0.0),
+    ]
+
+
+def test_assemble_context_with_document_hints():
+    hints = ["Page 4: A", "Page 7: B", "Page 4: A", "Page 9: C", "Page 12: D", "Page 7: B", "Page 15: E", "Page 20: F"]
+
+    context, chunk_info = extractor.assemble_extraction_context(_chunks(), hints)
+
+    assert context.startswith("\n[DOCUMENT ADDRESSING HINTS]\n")
+    hints_block = context.split("\n\n", 1)[0]
+    assert hints_block.splitlines()[2:] == ["Page 4: A", "Page 7: B", "Page 9: C", "Page 12: D", "Page 15: E"]
+    assert "Register map 0x0001" in context
+    assert "Pages included in context: [1, 2, 3]" in chunk_info
+
+
+def test_assemble_context_without_document_hints():
+    context, _ = extractor.assemble_extraction_context(_chunks(), [])
+
+    assert "[DOCUMENT ADDRESSING HINTS]" not in context
+    assert "PAGE 1 (Relevance: HIGH - Score: 12.0)" in context
@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 """Test intelligent PDF extraction on Caterpillar EMCP 4 manual."""
 
+import os
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 from dataclasses import dataclass, field
 from typing import Optional
+import ahocorasick
 import pdfplumber
+import pymupdf
 
 @dataclass
 class Chunk:
@@ -15,23 +20,53 @@ class Chunk:
     has_table: bool = False
     title: Optional[str] = None
 
-def score_page(text: str, tables: list) -> float:
+@dataclass
+class PageFeatures:
+    """Page text with its case-folded and split forms, computed once."""
+    text: str
+    lower: str
+    first_lines: list[str]
+    lower_first_lines: list[str]
+
+def page_features(text: str) -> PageFeatures:
+    """Build the PageFeatures for a page's text."""
+    first_lines = [line.strip() for line in text.split('\n', 10)[:10]]
+    return PageFeatures(text=text, lower=text.lower(), first_lines=first_lines,
+                        lower_first_lines=[line.lower() for line in first_lines])
+
+# Register indicators, one named group per pattern so a single scan can
+# tell which patterns occur
+_INDICATOR_PATTERNS = [r'\bmodbus\b', r'\bregister\b', r'0x[0-9a-f]{2,4}', 
+                       r'scaling:', r'offset:', r'data\s*range', r'\br/?w\b']
+_INDICATOR_RE = re.compile("|".join(f"(?P<p{i}>{p})" for i, p in enumerate(_INDICATOR_PATTERNS)))
+
+# Appendix headings, section titles in caps and the "add 40,000 to" PDU
+# addressing hint. Inputs to _APPENDIX_RE and _PDU_HINT_RE are lowercased.
+_APPENDIX_RE = re.compile(r'appendix\s+[a-z]')
+_TITLE_CAPS_RE = re.compile(r'^[A-Z][A-Z\s]{5,40}$')
+_PDU_HINT_RE = re.compile(r'add\s*40.?000\s*to')
+
+# Keyword density weights, counted in one pass with Aho-Corasick
+_KEYWORDS = {'modbus': 1.5, 'register': 1.0, 'scaling': 1.2, 'offset': 1.0,
+             'uint16': 0.8, 'int16': 0.8, 'address': 0.5}
+_KEYWORD_AUTOMATON = ahocorasick.Automaton()
+for _kw in _KEYWORDS:
+    _KEYWORD_AUTOMATON.add_word(_kw, _kw)
+_KEYWORD_AUTOMATON.make_automaton()
+
+def score_page(pf: PageFeatures, tables: list) -> float:
     """Score a page for Modbus register content."""
     score = 0.0
-    text_lower = text.lower()
+    text_lower = pf.lower
     
     # Check for register indicators
-    patterns = [r'\bmodbus\b', r'\bregister\b', r'0x[0-9a-f]{2,4}', 
-                r'scaling:', r'offset:', r'data\s*range', r'\br/?w\b']
-    for p in patterns:
-        if re.search(p, text_lower):
-            score += 2.0
+    found = {m.lastgroup for m in _INDICATOR_RE.finditer(text_lower)}
+    score += 2.0 * len(found)
     
     # Keyword density
-    keywords = {'modbus': 1.5, 'register': 1.0, 'scaling': 1.2, 'offset': 1.0,
-                'uint16': 0.8, 'int16': 0.8, 'address': 0.5}
-    for kw, wt in keywords.items():
-        score += min(text_lower.count(kw) * wt, 5.0)
+    counts = Counter(kw for _, kw in _KEYWORD_AUTOMATON.iter(text_lower))
+    for kw, count in counts.items():
+        score += min(count * _KEYWORDS[kw], 5.0)
     
     # Table scoring
     for tbl in tables:
@@ -44,21 +79,51 @@ def score_page(text: str, tables: list) -> float:
                 score += 2.0
     
     # Appendix bonus
-    if re.search(r'appendix\s+[a-z]', text_lower) and 'register' in text_lower:
+    if _APPENDIX_RE.search(text_lower) and 'register' in text_lower:
         score += 8.0
     
     return score
 
-def get_title(text: str) -> Optional[str]:
+def get_title(pf: PageFeatures) -> Optional[str]:
     """Extract section title."""
-    for line in text.split('\n')[:10]:
-        line = line.strip()
-        if re.match(r'^APPENDIX\s+[A-Z]', line, re.I):
+    for line, line_lower in zip(pf.first_lines, pf.lower_first_lines):
+        if _APPENDIX_RE.match(line_lower):
             return line
-        if re.match(r'^[A-Z][A-Z\s]{5,40}$', line):
+        if _TITLE_CAPS_RE.match(line):
             return line
     return None
 
+# Pages scoring above this on text alone get pdfplumber table extraction
+_TABLE_CANDIDATE_SCORE = 3.0
+
+# PDF opened once per worker process (set by _init_worker). PyMuPDF is used
+# for text; pdfplumber is only opened if a page needs table extraction.
+_worker_bytes = None
+_worker_doc = None
+_worker_pdf = None
+
+def _init_worker(pdf_bytes: bytes):
+    """Open the PDF once in each worker process."""
+    global _worker_bytes, _worker_doc
+    _worker_bytes = pdf_bytes
+    _worker_doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+
+def _extract_one_page(index: int) -> tuple[int, PageFeatures, list]:
+    """Extract text and tables for one page (0-based index) in a worker."""
+    global _worker_pdf
+    pf = page_features(_worker_doc[index].get_text())
+    
+    # Layout analysis for tables is the slow part, so only run it on pages
+    # that already look register-related from their text
+    tables = []
+    if score_page(pf, []) > _TABLE_CANDIDATE_SCORE or _INDICATOR_RE.search(pf.lower):
+        if _worker_pdf is None:
+            _worker_pdf = pdfplumber.open(BytesIO(_worker_bytes))
+        page = _worker_pdf.pages[index]
+        tables = page.extract_tables() or []
+        page.flush_cache()
+    return index + 1, pf, tables
+
 def main():
     pdf_path = "/mnt/user-data/uploads/Caterpillar-EMCP_4_SCADA_Data_Links___Application___Installation_Guide.pdf"
     
@@ -72,22 +137,25 @@ def main():
     chunks = []
     hints = []
     
-    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        print(f"\nTotal pages: {len(pdf.pages)}")
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        n_pages = doc.page_count
+    print(f"\nTotal pages: {n_pages}")
+    
+    # Pages are independent, so extract them across all cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker,
+                             initargs=(pdf_bytes,)) as executor:
+        pages = list(executor.map(_extract_one_page, range(n_pages), chunksize=4))
+    
+    for i, pf, tables in pages:
+        # Check for addressing hints
+        if _PDU_HINT_RE.search(pf.lower):
+            hints.append(f"Page {i}: PDU addressing hint found")
+        
+        score = score_page(pf, tables)
+        title = get_title(pf)
         
-        for i, page in enumerate(pdf.pages, 1):
-            text = page.extract_text() or ""
-            tables = page.extract_tables() or []
-            
-            # Check for addressing hints
-            if re.search(r'add\s*40.?000\s*to', text.lower()):
-                hints.append(f"Page {i}: PDU addressing hint found")
-            
-            score = score_page(text, tables)
-            title = get_title(text)
-            
-            chunks.append(Chunk(text=text, page=i, score=score, 
-                               has_table=bool(tables), title=title))
+        chunks.append(Chunk(text=pf.text, page=i, score=score, 
+                           has_table=bool(tables), title=title))
     
     # Sort by score
     chunks.sort(key=lambda x: x.score, reverse=True)